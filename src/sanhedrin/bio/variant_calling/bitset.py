@@ -0,0 +1,48 @@
+"""Packed uint64 bitsets for variant call sets.
+
+Each variant is interned to a dense integer id; a call set becomes a
+bitset of ceil(N / 64) words, so set algebra reduces to bitwise ops and
+popcount over contiguous arrays.
+"""
+
+import numpy as np
+
+_POPCOUNT_LUT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def n_words(n_bits: int) -> int:
+    """Number of uint64 words needed to hold n_bits."""
+    return (n_bits + 63) // 64
+
+
+def to_bitset(ids: np.ndarray, n_bits: int) -> np.ndarray:
+    """Pack integer ids in [0, n_bits) into a uint64 bitset."""
+    flags = np.zeros(n_words(n_bits) * 64, dtype=bool)
+    flags[ids] = True
+    return np.packbits(flags, bitorder="little").view(np.uint64)
+
+
+def popcount(words: np.ndarray, axis: int | None = None) -> np.ndarray | int:
+    """Count set bits in a uint64 array, summed over `axis` (all if None)."""
+    words = np.ascontiguousarray(words, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+        per_word = np.bitwise_count(words)
+    else:
+        per_word = _POPCOUNT_LUT[words.view(np.uint8)].reshape(*words.shape, 8).sum(-1)
+    total = per_word.sum(axis=axis, dtype=np.int64)
+    return int(total) if axis is None else total
+
+
+def pairwise_intersections(bits: np.ndarray) -> np.ndarray:
+    """All-pairs intersection counts of stacked bitsets.
+
+    `bits` is uint64[M, W]; returns int64[M, M] with |B_i ∩ B_j| at [i, j].
+    Words are processed in chunks so the M x M x chunk temporary stays small.
+    """
+    M, W = bits.shape
+    inter = np.zeros((M, M), dtype=np.int64)
+    chunk = max(1, (1 << 23) // max(M * M, 1))
+    for lo in range(0, W, chunk):
+        block = bits[:, lo:lo + chunk]
+        inter += popcount(block[:, None, :] & block[None, :, :], axis=-1)
+    return inter
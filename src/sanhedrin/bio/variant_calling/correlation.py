@@ -4,14 +4,25 @@ Estimates rho_ij between variant callers using:
 - Jaccard similarity on variant call sets
 - Cohen's kappa on per-site agreement
 
+Callers with comparable call-set sizes are compared all-pairs at once as
+packed bitsets; pairs involving a much smaller call set use a sorted-array
+merge instead.
+
 These serve as the empirical correlation matrix for D_eff computation.
 """
 
+import hashlib
 import numpy as np
-from typing import Dict, List, Set, Tuple
+import os
+from array import array
+from functools import lru_cache, partial
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Set, Tuple
 from pathlib import Path
 import warnings
 
+from .bitset import pairwise_intersections, to_bitset
+
 try:
     from cyvcf2 import VCF
     HAS_CYVCF2 = True
@@ -19,23 +30,96 @@ except ImportError:
     HAS_CYVCF2 = False
     warnings.warn("cyvcf2 not installed. Install with: pip install cyvcf2")
 
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# Callers below this fraction of the largest call set use the sorted merge
+SPARSE_RATIO = 0.25
+
+
+def _iter_variants(vcf_path: str | Path,
+                   min_qual: float,
+                   pass_only: bool) -> Iterator[Tuple[str, int, str, str]]:
+    if not HAS_CYVCF2:
+        raise ImportError("cyvcf2 required for VCF parsing")
+
+    for v in VCF(str(vcf_path)):
+        if pass_only and v.FILTER is not None:
+            continue
+        if v.QUAL is not None and v.QUAL < min_qual:
+            continue
+        for alt in v.ALT:
+            yield (v.CHROM, v.POS, v.REF, alt)
+
 
 def load_variant_positions(vcf_path: str | Path,
                            min_qual: float = 0.0,
                            pass_only: bool = True) -> Set[Tuple[str, int, str, str]]:
     """Load variant positions from VCF as set of (chrom, pos, ref, alt)."""
+    return set(_iter_variants(vcf_path, min_qual, pass_only))
+
+
+@lru_cache(maxsize=1 << 12)
+def _contig_digest(chrom: str) -> int:
+    return int.from_bytes(hashlib.blake2b(chrom.encode(), digest_size=8, person=b"contig").digest(), "little")
+
+
+@lru_cache(maxsize=1 << 16)
+def _allele_digest(ref: str, alt: str) -> int:
+    return int.from_bytes(hashlib.blake2b(f"{ref}\t{alt}".encode(), digest_size=8, person=b"allele").digest(), "little")
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    # SplitMix64 finaliser: a bijection on uint64 that spreads every input bit
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def load_variant_ids(vcf_path: str | Path,
+                     min_qual: float = 0.0,
+                     pass_only: bool = True) -> np.ndarray:
+    """Load variants from VCF as a sorted, unique int64 array of keys.
+
+    Contigs and (ref, alt) pairs repeat heavily, so each distinct one is
+    digested once (BLAKE2b, memoised); records only append their position
+    and label digest, and keys are mixed in one vectorised pass at the end.
+    Keys are deterministic, so they are stable across processes.
+    """
     if not HAS_CYVCF2:
         raise ImportError("cyvcf2 required for VCF parsing")
 
-    variants = set()
+    positions = array("q")
+    labels = array("Q")
+    add_position = positions.append
+    add_label = labels.append
+    last_chrom = None
+    contig = 0
     for v in VCF(str(vcf_path)):
         if pass_only and v.FILTER is not None:
             continue
-        if v.QUAL is not None and v.QUAL < min_qual:
+        qual = v.QUAL
+        if qual is not None and qual < min_qual:
             continue
+        chrom = v.CHROM
+        if chrom != last_chrom:  # records are grouped by contig
+            last_chrom = chrom
+            contig = _contig_digest(chrom)
+        pos = v.POS
+        ref = v.REF
         for alt in v.ALT:
-            variants.add((v.CHROM, v.POS, v.REF, alt))
-    return variants
+            add_position(pos)
+            add_label(contig ^ _allele_digest(ref, alt))
+    pos = np.frombuffer(positions, dtype=np.int64).view(np.uint64)
+    keys = _mix64(np.frombuffer(labels, dtype=np.uint64) ^ (pos * np.uint64(0x9E3779B97F4A7C15)))
+    # Sort + adjacent-difference; np.unique is several times slower on int64 keys
+    keys = np.sort(keys.view(np.int64))
+    return keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
 
 
 def jaccard_similarity(set_a: set, set_b: set) -> float:
@@ -45,11 +129,63 @@ def jaccard_similarity(set_a: set, set_b: set) -> float:
     return intersection / union if union > 0 else 0.0
 
 
+if HAS_NUMBA:
+    @njit(cache=True)
+    def _sorted_intersection_count(a, b):
+        i = j = n = 0
+        while i < a.shape[0] and j < b.shape[0]:
+            if a[i] < b[j]:
+                i += 1
+            elif a[i] > b[j]:
+                j += 1
+            else:
+                n += 1
+                i += 1
+                j += 1
+        return n
+else:
+    def _sorted_intersection_count(a, b):
+        if len(a) > len(b):
+            a, b = b, a
+        idx = np.searchsorted(b, a)
+        hit = idx < len(b)
+        return int(np.count_nonzero(b[idx[hit]] == a[hit]))
+
+
+def jaccard_sorted(a: np.ndarray, b: np.ndarray) -> float:
+    """Jaccard similarity of two sorted, duplicate-free int64 id arrays.
+
+    Uses |A ∪ B| = |A| + |B| - |A ∩ B|, so the union is never built.
+    """
+    intersection = _sorted_intersection_count(a, b)
+    union = len(a) + len(b) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def intern_variants(
+    call_ids: Dict[str, np.ndarray],
+) -> Tuple[Dict[str, np.ndarray], int]:
+    """Map the union of all callers' variant keys to dense ids 0..N-1.
+
+    Inputs are sorted, unique key arrays (see `load_variant_ids`); the
+    returned per-caller id arrays are sorted as well. Also returns N.
+    """
+    names = list(call_ids)
+    if not names:
+        return {}, 0
+    universe, dense = np.unique(
+        np.concatenate([call_ids[name] for name in names]), return_inverse=True
+    )
+    splits = np.cumsum([len(call_ids[name]) for name in names])[:-1]
+    return dict(zip(names, np.split(dense.astype(np.int64), splits))), len(universe)
+
+
 def compute_correlation_matrix(
     vcf_paths: Dict[str, str | Path],
     min_qual: float = 0.0,
     pass_only: bool = True,
     method: str = "jaccard",
+    n_jobs: int = -1,
 ) -> Tuple[np.ndarray, List[str]]:
     """Compute pairwise correlation matrix from variant caller VCFs.
 
@@ -59,6 +195,8 @@ def compute_correlation_matrix(
         Mapping of caller name -> VCF file path.
     method : str
         'jaccard' (default) or 'kappa'.
+    n_jobs : int
+        Number of worker processes parsing VCFs; -1 uses all cores.
 
     Returns
     -------
@@ -67,26 +205,49 @@ def compute_correlation_matrix(
     caller_names : list[str]
         Ordered list of caller names.
     """
+    if method != "jaccard":
+        raise ValueError(f"Unknown method: {method}")
+
     caller_names = sorted(vcf_paths.keys())
     M = len(caller_names)
 
-    # Load all call sets
-    call_sets = {}
-    for name in caller_names:
-        call_sets[name] = load_variant_positions(
-            vcf_paths[name], min_qual=min_qual, pass_only=pass_only
-        )
+    if n_jobs != -1 and n_jobs < 1:
+        raise ValueError(f"n_jobs must be -1 or >= 1, got {n_jobs}")
+
+    # Per-record work holds the GIL, so VCFs are parsed in worker processes;
+    # the returned key arrays are plain int64 and pickle cheaply
+    n_workers = (os.cpu_count() or 1) if n_jobs == -1 else n_jobs
+    n_workers = min(M, n_workers)
+    loader = partial(load_variant_ids, min_qual=min_qual, pass_only=pass_only)
+    paths = [vcf_paths[name] for name in caller_names]
+    if n_workers <= 1:
+        call_ids = dict(zip(caller_names, map(loader, paths)))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            call_ids = dict(zip(caller_names, pool.map(loader, paths)))
+
+    # Intern variants once; balanced pairs then cost bitwise ops + popcount
+    ids, n_variants = intern_variants(call_ids)
+    sizes = np.array([len(ids[name]) for name in caller_names], dtype=np.int64)
+    dense = sizes >= SPARSE_RATIO * sizes.max(initial=0)
 
     rho = np.eye(M)
+    if dense.any():
+        idx = np.flatnonzero(dense)
+        bits = np.stack([to_bitset(ids[caller_names[k]], n_variants) for k in idx])
+        inter = pairwise_intersections(bits)
+        union = sizes[idx, None] + sizes[None, idx] - inter
+        rho[np.ix_(idx, idx)] = np.divide(
+            inter, union, out=np.zeros(union.shape), where=union > 0
+        )
+        np.fill_diagonal(rho, 1.0)
+
+    # Pairs involving a much smaller call set go through the sorted merge
     for i in range(M):
         for j in range(i + 1, M):
-            if method == "jaccard":
-                sim = jaccard_similarity(
-                    call_sets[caller_names[i]],
-                    call_sets[caller_names[j]],
-                )
-            else:
-                raise ValueError(f"Unknown method: {method}")
+            if dense[i] and dense[j]:
+                continue
+            sim = jaccard_sorted(ids[caller_names[i]], ids[caller_names[j]])
             rho[i, j] = sim
             rho[j, i] = sim
 
@@ -5,17 +5,37 @@ Supports:
 - Union (any caller)
 - Intersection (all callers)
 - Weighted vote (by individual F1)
+
+Call sets are given as a dict (caller name -> calls) or a plain list, each
+entry either a Python set of variants or a sorted, unique int64 key array
+(see `correlation.load_variant_ids`); results keep the input representation.
 """
 
 import numpy as np
+from functools import reduce
 from typing import Dict, List, Set
 from collections import Counter
 
+from .bitset import popcount
+
+CallSets = Dict[str, set] | Dict[str, np.ndarray] | List[set] | List[np.ndarray]
+
+# Words per block in evaluate_ensemble_bits (512 KiB per operand)
+_EVAL_BLOCK_WORDS = 1 << 16
+
+
+def _values(call_sets: CallSets) -> List[set] | List[np.ndarray]:
+    return list(call_sets.values()) if isinstance(call_sets, dict) else list(call_sets)
+
+
+def _is_id_arrays(values: List[set] | List[np.ndarray]) -> bool:
+    return bool(values) and isinstance(values[0], np.ndarray)
+
 
 def majority_vote(
-    call_sets: Dict[str, set],
+    call_sets: CallSets,
     threshold: int | None = None,
-) -> set:
+) -> set | np.ndarray:
     """Majority vote ensemble: keep variants called by >= threshold callers.
 
     Default threshold: ceil(M/2).
@@ -24,31 +44,39 @@ def majority_vote(
     if threshold is None:
         threshold = (M + 1) // 2
 
+    values = _values(call_sets)
+    if _is_id_arrays(values):
+        ids, counts = np.unique(np.concatenate(values), return_counts=True)
+        return ids[counts >= threshold]
+
     counts: Counter = Counter()
-    for variants in call_sets.values():
-        for v in variants:
-            counts[v] += 1
+    for variants in values:
+        counts.update(variants)
 
     return {v for v, c in counts.items() if c >= threshold}
 
 
-def union_vote(call_sets: Dict[str, set]) -> set:
+def union_vote(call_sets: CallSets) -> set | np.ndarray:
     """Union: keep any variant called by at least one caller."""
-    result: set = set()
-    for variants in call_sets.values():
-        result |= variants
-    return result
+    values = _values(call_sets)
+    if _is_id_arrays(values):
+        # One sort over all calls beats pairwise np.union1d for M > 2
+        return np.unique(np.concatenate(values))
+    return set().union(*values)
 
 
-def intersection_vote(call_sets: Dict[str, set]) -> set:
+def intersection_vote(call_sets: CallSets) -> set | np.ndarray:
     """Intersection: keep only variants called by all callers."""
-    sets = list(call_sets.values())
-    if not sets:
+    values = _values(call_sets)
+    if _is_id_arrays(values):
+        if len(values) == 1:
+            return values[0].copy()
+        # Smallest first so every step shrinks the running result
+        values = sorted(values, key=len)
+        return reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), values)
+    if not values:
         return set()
-    result = sets[0].copy()
-    for s in sets[1:]:
-        result &= s
-    return result
+    return set(values[0]).intersection(*values[1:])
 
 
 def evaluate_ensemble(
@@ -62,7 +90,34 @@ def evaluate_ensemble(
     tp = len(ensemble_calls & truth_set)
     fp = len(ensemble_calls - truth_set)
     fn = len(truth_set - ensemble_calls)
+    return _scores(tp, fp, fn)
+
 
+def evaluate_ensemble_bits(
+    ensemble_bits: np.ndarray,
+    truth_bits: np.ndarray,
+) -> Dict[str, float]:
+    """Evaluate a bitset-encoded ensemble against a bitset truth set.
+
+    Both inputs are uint64 bitsets over the same variant ids (see
+    `bitset.to_bitset`). Only TP needs an AND; FP and FN follow from the
+    set sizes, so each block costs one AND and three popcounts.
+    """
+    if ensemble_bits.shape != truth_bits.shape:
+        raise ValueError(
+            f"Bitset shapes differ: {ensemble_bits.shape} vs {truth_bits.shape}"
+        )
+    tp = n_ensemble = n_truth = 0
+    for lo in range(0, len(ensemble_bits), _EVAL_BLOCK_WORDS):
+        e = ensemble_bits[lo:lo + _EVAL_BLOCK_WORDS]
+        t = truth_bits[lo:lo + _EVAL_BLOCK_WORDS]
+        tp += popcount(e & t)
+        n_ensemble += popcount(e)
+        n_truth += popcount(t)
+    return _scores(tp, n_ensemble - tp, n_truth - tp)
+
+
+def _scores(tp: int, fp: int, fn: int) -> Dict[str, float]:
     precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
     recall = tp / (tp + fn) if (tp + fn) > 0 else 0.0
     f1 = 2 * precision * recall / (precision + recall) if (precision + recall) > 0 else 0.0
@@ -1,18 +1,43 @@
 """Collusion risk: R_coll = f_topology * f_repetition * f_stakes."""
 import numpy as np
 import networkx as nx
+from typing import Optional
 from .config import SimConfig
 
-def f_topology(G: nx.Graph, M: int, cfg: SimConfig) -> float:
-    if M <= 1:
+def _avg_clustering_dense(A: np.ndarray) -> float:
+    # Unweighted average clustering of an undirected graph, nodes with degree < 2 count as 0
+    M = A.shape[0]
+    if M == 0:
         return 0.0
-    max_edges = M * (M - 1) / 2
-    edge_density = G.number_of_edges() / max_edges if max_edges > 0 else 0.0
-    try:
-        clustering = nx.average_clustering(G)
-    except Exception:
-        clustering = 0.0
-    return min(1.0, cfg.alpha_edge * edge_density + cfg.alpha_clust * clustering)
+    A = (A != 0).astype(float)
+    np.fill_diagonal(A, 0.0)
+    closed = np.einsum('ij,jk,ki->i', A, A, A)
+    deg = A.sum(axis=1)
+    pairs = deg * (deg - 1)
+    return float(np.sum(np.divide(closed, pairs, out=np.zeros(M), where=pairs > 0)) / M)
+
+def _average_clustering(G: nx.Graph) -> float:
+    # Dense path only covers simple undirected graphs; others keep NetworkX semantics
+    if G.is_directed() or G.is_multigraph():
+        try:
+            return nx.average_clustering(G)
+        except Exception:
+            return 0.0
+    return _avg_clustering_dense(nx.to_numpy_array(G, weight=None))
+
+def f_topology(G: Optional[nx.Graph], M: int, cfg: SimConfig, edge_density: Optional[float] = None, clustering: Optional[float] = None) -> float:
+    # With both metrics precomputed, M and the metrics may be arrays over candidate M
+    if edge_density is None or clustering is None:
+        if M <= 1:
+            return 0.0
+        if G is None:
+            raise ValueError("f_topology needs G or both edge_density and clustering")
+        if edge_density is None:
+            max_edges = M * (M - 1) / 2
+            edge_density = G.number_of_edges() / max_edges if max_edges > 0 else 0.0
+        if clustering is None:
+            clustering = _average_clustering(G)
+    return np.where(np.asarray(M) > 1, np.minimum(1.0, cfg.alpha_edge * edge_density + cfg.alpha_clust * clustering), 0.0)[()]
 
 def f_repetition(T: int, delta: float, cfg: SimConfig) -> float:
     if delta < cfg.delta_crit:
@@ -26,8 +51,8 @@ def f_stakes(S: float, cfg: SimConfig) -> float:
         return 0.0
     return (S - cfg.S_min) ** cfg.gamma_stakes
 
-def compute_collusion_risk(M: int, G: nx.Graph, T: int, delta: float, S: float, cfg: SimConfig) -> float:
-    return f_topology(G, M, cfg) * f_repetition(T, delta, cfg) * f_stakes(S, cfg)
+def compute_collusion_risk(M: int, G: Optional[nx.Graph], T: int, delta: float, S: float, cfg: SimConfig, edge_density: Optional[float] = None, clustering: Optional[float] = None) -> float:
+    return f_topology(G, M, cfg, edge_density, clustering) * f_repetition(T, delta, cfg) * f_stakes(S, cfg)
 
 def percolation_threshold(M: int) -> float:
     return 1.0 / max(M - 1, 1)
@@ -4,18 +4,23 @@ D_eff = M^2 / sum(Sigma) * phi(G) for heterogeneous correlation.
 """
 import numpy as np
 import networkx as nx
+from functools import lru_cache
 from typing import Optional
 
-def topology_discount(G: nx.Graph, M: int) -> float:
-    if M <= 1:
-        return 1.0
-    max_edges = M * (M - 1) / 2
-    density = G.number_of_edges() / max_edges if max_edges > 0 else 0.0
-    return max(0.01, 1.0 - density)
+def topology_discount(G: Optional[nx.Graph], M: int, density: Optional[float] = None) -> float:
+    # With density precomputed, M and density may be arrays over candidate M
+    if density is None:
+        if M <= 1:
+            return 1.0
+        if G is None:
+            raise ValueError("topology_discount needs G or density")
+        max_edges = M * (M - 1) / 2
+        density = G.number_of_edges() / max_edges if max_edges > 0 else 0.0
+    return np.where(np.asarray(M) > 1, np.maximum(0.01, 1.0 - density), 1.0)[()]
 
-def effective_diversity(M: int, rho_bar: float, G: Optional[nx.Graph] = None) -> float:
-    phi = topology_discount(G, M) if G is not None else 1.0
-    return max(0.01, M * (1.0 - rho_bar) * phi)
+def effective_diversity(M: int, rho_bar: float, G: Optional[nx.Graph] = None, density: Optional[float] = None) -> float:
+    phi = topology_discount(G, M, density) if G is not None or density is not None else 1.0
+    return np.maximum(0.01, M * (1.0 - rho_bar) * phi)
 
 def effective_diversity_from_correlation(Sigma: np.ndarray, G: Optional[nx.Graph] = None) -> float:
     M = Sigma.shape[0]
@@ -27,6 +32,11 @@ def effective_diversity_from_correlation(Sigma: np.ndarray, G: Optional[nx.Graph
     return max(0.01, D * phi)
 
 def build_block_correlation_matrix(family_sizes: list, rho_within: float = 0.7, rho_between: float = 0.15) -> np.ndarray:
+    # Cached and shared between callers, so the returned array is read-only
+    return _build_block_corr(tuple(family_sizes), float(rho_within), float(rho_between))
+
+@lru_cache(maxsize=64)
+def _build_block_corr(family_sizes: tuple, rho_within: float, rho_between: float) -> np.ndarray:
     N = sum(family_sizes)
     Sigma = np.full((N, N), rho_between)
     idx = 0
@@ -34,10 +44,17 @@ def build_block_correlation_matrix(family_sizes: list, rho_within: float = 0.7,
         Sigma[idx:idx + size, idx:idx + size] = rho_within
         idx += size
     np.fill_diagonal(Sigma, 1.0)
+    # Sigma = (1 - rw) I + (rw - rb) blockdiag(J_k) + rb J, and J_k, J are PSD.
+    # For 0 <= rb <= rw every term is PSD, so the smallest eigenvalue is at
+    # least 1 - rw; at 1 - rw >= 1e-6 the clamp below would be a no-op.
+    if 0.0 <= rho_between <= rho_within <= 1.0 - 1e-6:
+        Sigma.flags.writeable = False
+        return Sigma
     eigvals, eigvecs = np.linalg.eigh(Sigma)
     eigvals = np.maximum(eigvals, 1e-6)
     Sigma = eigvecs @ np.diag(eigvals) @ eigvecs.T
     d = np.sqrt(np.diag(Sigma))
     Sigma = Sigma / np.outer(d, d)
     np.fill_diagonal(Sigma, 1.0)
+    Sigma.flags.writeable = False
     return Sigma
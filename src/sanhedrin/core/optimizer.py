@@ -1,12 +1,28 @@
 """Full L_total optimization for M*."""
 import numpy as np
-import networkx as nx
+from functools import lru_cache
+from types import SimpleNamespace
 from .config import SimConfig
 from .diversity import effective_diversity
-from .collusion_risk import compute_collusion_risk
+from .collusion_risk import _avg_clustering_dense, compute_collusion_risk
 
-def L_error(M, sigma2, rho_bar, G):
-    D = effective_diversity(M, rho_bar, G)
+@lru_cache(maxsize=4096)
+def _graph_metrics(M_min, M_max, p, seed=42):
+    # Edge density and clustering of the council graph for every M in [M_min, M_max].
+    # One G(M_max, p) adjacency is sampled and its leading M x M block used for each
+    # M; edges are i.i.d., so each block is itself a G(M, p) sample.
+    A = np.random.default_rng(seed).random((M_max, M_max)) < p
+    A = np.triu(A, 1)
+    A = (A | A.T).astype(float)
+    Ms = range(M_min, M_max + 1)
+    density = np.array([A[:M, :M].sum() / (M * (M - 1)) if M > 1 else 0.0 for M in Ms])
+    clustering = np.array([_avg_clustering_dense(A[:M, :M]) for M in Ms])
+    density.flags.writeable = False
+    clustering.flags.writeable = False
+    return density, clustering
+
+def L_error(M, sigma2, rho_bar, G, density=None):
+    D = effective_diversity(M, rho_bar, G, density)
     return sigma2 / D
 
 def L_cost(M, cfg):
@@ -15,20 +31,29 @@ def L_cost(M, cfg):
 def L_trust(M, M_target, cfg):
     return cfg.nu_trust * np.exp(-((M - M_target) ** 2) / (2 * cfg.sigma_trust ** 2))
 
-def L_coll(M, G, T, delta, S, cfg):
-    return cfg.lambda_coll * compute_collusion_risk(M, G, T, delta, S, cfg)
+def L_coll(M, G, T, delta, S, cfg, edge_density=None, clustering=None):
+    return cfg.lambda_coll * compute_collusion_risk(M, G, T, delta, S, cfg, edge_density, clustering)
+
+@lru_cache(maxsize=64)
+def _cost_grid(M_min, M_max, mu_cost, c_inf, c_synth):
+    # Candidate M and L_cost over them; L_cost only depends on these config fields
+    Ms = np.arange(M_min, M_max + 1)
+    cost = L_cost(Ms, SimpleNamespace(mu_cost=mu_cost, c_inf=c_inf, c_synth=c_synth))
+    Ms.flags.writeable = False
+    cost.flags.writeable = False
+    return Ms, cost
 
 def optimize_ensemble_size(E=0.5, S=0.5, rho_bar=0.3, p=0.0, T=10, delta=0.7, cfg=None, sigma2=1.0, enforce_odd=True):
     if cfg is None:
         cfg = SimConfig()
     M_target = cfg.M_min + int(4 * E / (1 - rho_bar + 0.01)) + int(4 * S * (1 + E))
-    best_M, best_loss = cfg.M_min, float('inf')
-    for M in range(cfg.M_min, cfg.M_max + 1):
-        G = nx.erdos_renyi_graph(M, min(p, 0.99), seed=42)
-        loss = L_error(M, sigma2, rho_bar, G) + L_cost(M, cfg) - L_trust(M, M_target, cfg) + L_coll(M, G, T, delta, S, cfg)
-        if loss < best_loss:
-            best_loss = loss
-            best_M = M
+    Ms, cost = _cost_grid(cfg.M_min, cfg.M_max, cfg.mu_cost, cfg.c_inf, cfg.c_synth)
+    best_M = cfg.M_min
+    if len(Ms) > 0:
+        density, clustering = _graph_metrics(cfg.M_min, cfg.M_max, min(p, 0.99), 42)
+        loss = (L_error(Ms, sigma2, rho_bar, None, density) + cost - L_trust(Ms, M_target, cfg)
+                + L_coll(Ms, None, T, delta, S, cfg, density, clustering))
+        best_M = int(Ms[np.argmin(loss)])
     if enforce_odd and best_M % 2 == 0:
         best_M = min(best_M + 1, cfg.M_max)
     return best_M